@@ -0,0 +1,170 @@
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app import jsonio
+from app.arguments import PROCESSED_SUFFIX, iter_argument_rows
+
+# Low-cardinality columns are stored as categoricals to keep the frame compact.
+# `transcript` (the processed file, relative to the folder) identifies a transcript;
+# `file_name` is the original upload name, which several transcripts may share.
+CATEGORY_COLUMNS = ["transcript", "file_name", "speaker", "proposal", "stance"]
+ARGUMENT_COLUMNS = ["transcript", "file_name", "utterance_index", "speaker", "proposal", "stance", "argument"]
+
+def _categorize(frame: pd.DataFrame) -> pd.DataFrame:
+    """Converts the repeated string columns of an argument frame to categoricals."""
+    frame = frame.astype({column: "category" for column in CATEGORY_COLUMNS})
+    frame["utterance_index"] = frame["utterance_index"].astype(np.int32)
+    return frame.reset_index(drop=True)
+
+class ArgumentCorpus:
+    """
+    Columnar view of every argument in a folder of `_processed.json` files.
+
+    Call `refresh()` to pick up processed files that are new, changed or deleted
+    since the last call; only new and changed files are parsed again.
+    """
+
+    def __init__(self, processed_folder: str, proposals: Optional[Dict[str, str]] = None):
+        self.processed_folder = processed_folder
+        self.proposals = proposals or {}
+        self.arguments = _categorize(pd.DataFrame({column: [] for column in ARGUMENT_COLUMNS}))
+        self.transcripts = pd.DataFrame(
+            {"file_name": pd.Series(dtype=object), "utterance_count": pd.Series(dtype=np.int32)},
+            index=pd.Index([], name="transcript"),
+        )
+        self._loaded = {}  # transcript -> mtime of its processed file
+
+    def refresh(self) -> int:
+        """Loads new or modified processed files and drops deleted ones. Returns the number of files read."""
+        changed = []
+        present = set()
+        for root, _, files in os.walk(self.processed_folder):
+            for name in files:
+                if name.endswith(PROCESSED_SUFFIX):
+                    path = os.path.join(root, name)
+                    transcript = os.path.relpath(path, self.processed_folder)
+                    mtime = os.stat(path).st_mtime_ns
+                    present.add(transcript)
+                    if self._loaded.get(transcript) != mtime:
+                        changed.append((transcript, path, mtime))
+        removed = set(self._loaded) - present
+        if not changed and not removed:
+            return 0
+
+        columns = {column: [] for column in ARGUMENT_COLUMNS}
+        file_names = {}
+        utterance_counts = {}
+        for transcript, path, mtime in changed:
+            data = jsonio.load(path)
+            file_name = data.get("file_name", os.path.basename(path))
+            utterances = data.get("utterances", [])
+            file_names[transcript] = file_name
+            utterance_counts[transcript] = len(utterances)
+            self._loaded[transcript] = mtime
+
+            for idx, proposal, argument, stance in iter_argument_rows(data, self.proposals):
+                columns["transcript"].append(transcript)
+                columns["file_name"].append(file_name)
+                columns["utterance_index"].append(idx)
+                columns["speaker"].append(str(utterances[idx - 1].get("speaker") or ""))
+                columns["proposal"].append(proposal)
+                columns["stance"].append(stance)
+                columns["argument"].append(argument)
+
+        new = pd.DataFrame(columns)
+        for transcript in removed:
+            del self._loaded[transcript]
+
+        stale = list(removed) + list(utterance_counts)
+        kept = self.arguments[~self.arguments["transcript"].isin(stale)]
+        self.arguments = _categorize(pd.concat([kept.astype({c: object for c in CATEGORY_COLUMNS}), new], ignore_index=True))
+
+        loaded = pd.DataFrame(
+            {"file_name": pd.Series(file_names, dtype=object), "utterance_count": pd.Series(utterance_counts, dtype=np.int32)}
+        ).rename_axis("transcript")
+        self.transcripts = pd.concat([self.transcripts.drop(stale, errors="ignore"), loaded]).sort_index()
+        return len(changed)
+
+    def argument_counts(self, by="proposal") -> pd.DataFrame:
+        """Number of arguments per value of `by` (a column name or list of column names)."""
+        return self.arguments.groupby(by, observed=True).size().rename("arguments").reset_index()
+
+    def stance_split(self) -> pd.DataFrame:
+        """Argument counts per proposal, with one column per stance."""
+        return (
+            self.arguments.groupby(["proposal", "stance"], observed=True)
+            .size()
+            .unstack("stance", fill_value=0)
+            .reset_index()
+        )
+
+    def timeline(self, bins: int = 10) -> pd.DataFrame:
+        """
+        Argument counts per proposal within each session, bucketed into `bins`
+        equal segments of the transcript by utterance position.
+        """
+        transcript_codes = self.arguments["transcript"].cat.codes.to_numpy()
+        totals = self.transcripts["utterance_count"].reindex(self.arguments["transcript"].cat.categories).to_numpy()[transcript_codes]
+        position = self.arguments["utterance_index"].to_numpy() - 1
+        segment = np.minimum(position * bins // np.maximum(totals, 1), bins - 1) + 1
+        return (
+            self.arguments.assign(segment=segment)
+            .groupby(["transcript", "file_name", "segment", "proposal"], observed=True)
+            .size()
+            .rename("arguments")
+            .reset_index()
+        )
+
+    def coverage(self) -> pd.DataFrame:
+        """For each proposal from `load_proposals`, how many arguments and transcripts mention it."""
+        stats = self.arguments.groupby("proposal", observed=True).agg(
+            arguments=("argument", "size"),
+            transcripts=("transcript", "nunique"),
+        )
+        stats.index = stats.index.astype(object)
+        stats = stats.reindex(list(self.proposals) or stats.index, fill_value=0)
+        stats.index.name = "proposal"
+        stats.insert(0, "text", stats.index.map(lambda key: self.proposals.get(key, "")))
+        stats["coverage"] = stats["transcripts"] / max(len(self.transcripts), 1)
+        return stats.reset_index()
+
+    def reports(self) -> Dict[str, pd.DataFrame]:
+        """All standard reports, keyed by name."""
+        return {
+            "by_proposal": self.argument_counts("proposal"),
+            "by_speaker": self.argument_counts(["transcript", "file_name", "speaker"]),
+            "stance_split": self.stance_split(),
+            "timeline": self.timeline(),
+            "coverage": self.coverage(),
+        }
+
+    def export(self, output_path: str):
+        """
+        Writes every report to `output_path`: one sheet per report for an .xlsx
+        path, otherwise one CSV per report inside the `output_path` directory.
+        """
+        reports = self.reports()
+        if output_path.lower().endswith(".xlsx"):
+            with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+                for name, report in reports.items():
+                    report.to_excel(writer, sheet_name=name, index=False)
+        else:
+            os.makedirs(output_path, exist_ok=True)
+            for name, report in reports.items():
+                report.to_csv(os.path.join(output_path, f"{name}.csv"), index=False)
+
+if __name__ == "__main__":
+    # Usage: python -m app.analytics <processed_folder> <output.xlsx | output_dir> [proposals.xlsx]
+    proposals = {}
+    if len(sys.argv) > 3:
+        from main import load_proposals
+        proposals = load_proposals(sys.argv[3])
+
+    corpus = ArgumentCorpus(sys.argv[1], proposals)
+    print(f"Loaded {corpus.refresh()} processed transcripts.")
+    corpus.export(sys.argv[2])
+    print(f"Reports written to {sys.argv[2]}")
@@ -0,0 +1,238 @@
+import csv
+import io
+import math
+import os
+import re
+import sys
+from collections import Counter
+from typing import Dict, Optional
+from app import jsonio
+
+PROCESSED_SUFFIX = "_processed.json"
+STANCES = ("for", "against", "unknown")
+
+# Columns written by COPY, in order (see the `arguments` table in models.py).
+ARGUMENT_COLUMNS = ("file_id", "utterance_index", "proposal", "argument", "stance")
+
+def infer_stance(argument_text: str) -> str:
+    """Derives a stance from a "[Claim] because [reasons]." argument sentence."""
+    claim = argument_text.lower().split(" because ", 1)[0]
+    if " should not " in claim or " shouldn't " in claim:
+        return "against"
+    if " should " in claim:
+        return "for"
+    return "unknown"
+
+# Words too common in proposals and claims to tell proposals apart.
+_STOPWORDS = {
+    "a", "an", "and", "are", "be", "because", "by", "for", "in", "is", "it", "not", "of",
+    "on", "or", "should", "that", "the", "to", "used", "we", "with",
+}
+
+def _words(text: str) -> set:
+    """Lower-cased content words of `text`, with a plural "s" stripped."""
+    words = set()
+    for word in re.findall(r"[a-z]+", str(text).lower()):
+        if word not in _STOPWORDS:
+            words.add(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word)
+    return words
+
+def proposal_matcher(proposals: Dict[str, str]):
+    """
+    Returns a function mapping an argument's proposal reference and sentence to a
+    key of `proposals` ("" when nothing matches).
+
+    A reference that is already a key, or a proposal's text, maps directly.
+    Otherwise the claim (the part before "because"), then the whole sentence if
+    the claim is ambiguous, is compared with each proposal's text. Shared words are
+    weighted by how few proposals contain them, so words every proposal uses
+    (e.g. "spaces") don't decide the match; ties match nothing.
+    """
+    proposals = proposals or {}
+    by_text = {str(text).strip().lower(): key for key, text in proposals.items()}
+    vocabularies = {key: _words(text) for key, text in proposals.items()}
+    document_frequency = Counter(word for words in vocabularies.values() for word in words)
+    weights = {word: math.log((1 + len(proposals)) / count) for word, count in document_frequency.items()}
+
+    def best(words: set) -> str:
+        scores = sorted(
+            ((sum(weights[word] for word in words & vocabulary), key) for key, vocabulary in vocabularies.items()),
+            reverse=True,
+        )
+        if not scores or scores[0][0] <= 0 or (len(scores) > 1 and scores[1][0] == scores[0][0]):
+            return ""
+        return scores[0][1]
+
+    def match(reference, argument_text: str) -> str:
+        # Model output is untrusted: only scalar references are looked up
+        reference = str(reference) if isinstance(reference, (str, int, float)) else None
+        if reference in proposals:
+            return reference
+        if reference and str(reference).strip().lower() in by_text:
+            return by_text[str(reference).strip().lower()]
+        text = f"{reference or ''} {argument_text}"
+        claim = text.lower().split(" because ", 1)[0]
+        return best(_words(claim)) or best(_words(text)) or str(reference or "")
+
+    return match
+
+def _normalize(arguments, match) -> list:
+    if not isinstance(arguments, list):  # e.g. "None" or a lone dict from the model
+        return []
+    normalized = []
+    for argument in arguments:
+        if isinstance(argument, dict):
+            text = argument.get("argument") or argument.get("text") or ""
+            reference = argument.get("proposal")
+            stance = argument.get("stance")
+        else:
+            text, reference, stance = argument, None, None
+        if isinstance(text, str) and text.strip():
+            stance = stance.lower() if isinstance(stance, str) else None
+            normalized.append({
+                "proposal": match(reference, text),
+                "argument": text,
+                "stance": stance if stance in STANCES else infer_stance(text),
+            })
+    return normalized
+
+def normalize_arguments(arguments, proposals: Optional[Dict[str, str]] = None) -> list:
+    """
+    Converts model output (a list of plain "[Claim] because [reasons]." sentences
+    or dicts) into [{"proposal": <proposal key>, "argument": <sentence>, "stance": ...}, ...].
+    Anything else, and list items that aren't sentences, are dropped.
+    """
+    return _normalize(arguments, proposal_matcher(proposals))
+
+def iter_argument_rows(processed_data: dict, proposals: Optional[Dict[str, str]] = None):
+    """
+    Yields (utterance_index, proposal, argument, stance) for every argument in a
+    processed transcript (see `normalize_arguments`). With `proposals`, arguments
+    that don't name a proposal key are attributed by `proposal_matcher`.
+    """
+    match = proposal_matcher(proposals)
+    for idx, utterance in enumerate(processed_data.get("utterances", []), start=1):
+        if not isinstance(utterance, dict):
+            continue
+        for argument in _normalize(utterance.get("arguments"), match):
+            yield idx, argument["proposal"], argument["argument"], argument["stance"]
+
+def load_arguments(conn, cursor, file_id: str, processed_data: dict, proposals: Optional[Dict[str, str]] = None) -> int:
+    """
+    Replaces the arguments of one file with those in `processed_data` using COPY,
+    then refreshes that file's rows in `transcript_argument_counts`. Pass
+    `proposals` to attribute arguments that don't name a proposal key.
+
+    Returns the number of arguments loaded.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in iter_argument_rows(processed_data, proposals):
+        writer.writerow((file_id, *row))
+        count += 1
+    buffer.seek(0)
+
+    try:
+        cursor.execute("DELETE FROM transcript_argument_counts WHERE file_id = %s;", (file_id,))
+        cursor.execute("DELETE FROM arguments WHERE file_id = %s;", (file_id,))
+        cursor.copy_expert(
+            f"COPY arguments ({', '.join(ARGUMENT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (proposal))",
+            buffer,
+        )
+        cursor.execute(
+            """
+            INSERT INTO transcript_argument_counts (file_id, proposal, stance, argument_count)
+            SELECT file_id, proposal, stance, COUNT(*)
+            FROM arguments
+            WHERE file_id = %s
+            GROUP BY file_id, proposal, stance;
+            """,
+            (file_id,),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return count
+
+def save_analysis(conn, cursor, file_id: str, content_hash: str, processed_data: dict, proposals: Optional[Dict[str, str]] = None) -> int:
+    """
+    Stores an upload's analysis: marks it processed with `processed_data` as its
+    results, shares the results with unfinished (or never analyzed) uploads of the
+    same content, and loads its arguments. Commits; returns the number of arguments.
+    """
+    from psycopg2.extras import Json  # Only needed when writing to the database
+
+    try:
+        cursor.execute(
+            """
+            UPDATE files SET status = 'processed', results = %s
+            WHERE id = %s
+               OR (content_hash = %s AND (status = 'analyzing' OR (status = 'processed' AND results IS NULL)));
+            """,
+            (Json(processed_data, dumps=jsonio.dumps), file_id, content_hash),
+        )
+    except Exception:
+        conn.rollback()
+        raise
+    return load_arguments(conn, cursor, file_id, processed_data, proposals)  # Commits the results with the arguments
+
+def load_processed_folder(conn, cursor, processed_folder: str, proposals: Optional[Dict[str, str]] = None) -> int:
+    """
+    Bulk loads every `_processed.json` file written by main.py or by upload
+    analysis. Each transcript is matched to (or recorded as) a row in `files` by
+    its content hash when it has one, otherwise by its file name. Of several
+    uploads with the same content, only one carries the arguments.
+    """
+    total = 0
+    for root, _, files in os.walk(processed_folder):
+        for file_name in sorted(files):
+            if not file_name.endswith(PROCESSED_SUFFIX):
+                continue
+            data = jsonio.load(os.path.join(root, file_name))
+            transcript_name = data.get("file_name", file_name)
+            content_hash = data.get("content_hash")
+
+            if content_hash:
+                cursor.execute(
+                    """
+                    SELECT id FROM files
+                    WHERE content_hash = %s
+                    ORDER BY EXISTS (SELECT 1 FROM arguments a WHERE a.file_id = files.id) DESC, uploaded_at
+                    LIMIT 1;
+                    """,
+                    (content_hash,),
+                )
+            else:
+                cursor.execute("SELECT id FROM files WHERE file_name = %s LIMIT 1;", (transcript_name,))
+            row = cursor.fetchone()
+            if row:
+                file_id = row["id"]
+            else:
+                cursor.execute(
+                    """
+                    INSERT INTO files (file_name, content_hash, status, processed_at)
+                    VALUES (%s, %s, 'processed', CURRENT_TIMESTAMP)
+                    RETURNING id;
+                    """,
+                    (transcript_name, content_hash),
+                )
+                file_id = cursor.fetchone()["id"]
+
+            total += load_arguments(conn, cursor, str(file_id), data, proposals)
+            print(f"Loaded arguments for {transcript_name}")
+    return total
+
+if __name__ == "__main__":
+    # Usage: python -m app.arguments <processed_folder> [proposals.xlsx]
+    from app.database import get_db_connection
+
+    proposals = {}
+    if len(sys.argv) > 2:
+        from main import load_proposals
+        proposals = load_proposals(sys.argv[2])
+
+    conn, cursor = get_db_connection()
+    print(f"Loaded {load_processed_folder(conn, cursor, sys.argv[1], proposals)} arguments.")
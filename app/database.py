@@ -1,25 +1,46 @@
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, register_default_jsonb
+from app.jsonio import loads
 
-# Load environment variables
-DATABASE_URL = os.getenv("DATABASE_URL")
+# The connection is opened on first use (or by the app's startup hook), not at import.
+conn = None
+cursor = None
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set. Ensure it is defined in Railway.")
+def open_db_connection():
+    """
+    Opens a new database connection and cursor. Threads use their own (and close
+    it when done) so their transactions never mix with the shared connection's.
+    """
+    # Load environment variables
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL is not set. Ensure it is defined in Railway.")
 
-# Connect to PostgreSQL database
-try:
-    conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-    cursor = conn.cursor()
-    print("Successfully connected to the database!") # Good for debugging
-except psycopg2.OperationalError as e:
-    print("Error connecting to the database:", e)
-    raise
+    # Connect to PostgreSQL database
+    try:
+        new_conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+        register_default_jsonb(new_conn, loads=loads)  # Parse JSONB results with the fast JSON backend
+        print("Successfully connected to the database!") # Good for debugging
+    except psycopg2.OperationalError as e:
+        print("Error connecting to the database:", e)
+        raise
+    return new_conn, new_conn.cursor()
 
 def get_db_connection():
     """
-    Returns the database connection and cursor.  This is a helper function
-    to make it easier to access the connection from other modules.
+    Returns the database connection and cursor, connecting on the first call.
+    This is a helper function to make it easier to access the connection from
+    other modules.
     """
+    global conn, cursor
+    if conn is None or conn.closed:
+        conn, cursor = open_db_connection()
     return conn, cursor
+
+def close_db_connection():
+    """Closes the database connection (called when the app shuts down)."""
+    global conn, cursor
+    if conn is not None and not conn.closed:
+        conn.close()
+    conn, cursor = None, None
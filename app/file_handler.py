@@ -1,11 +1,16 @@
 import os
-import shutil
-from uuid import uuid4
+import hashlib
+import tempfile
+import psycopg2
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.database import get_db_connection
 
 # 1. Define Storage Directories:
 UPLOAD_DIR = "/storage/inputs"  # Primary upload directory (Railway volume).
 PROCESSED_DIR = "/storage/outputs"  # Directory for processed files.
+ALLOWED_EXTENSIONS = {".xlsx", ".csv"}
+CHUNK_SIZE = 1024 * 1024  # Bytes hashed and written per read.
 
 # 2. Directory Creation Function:
 def create_upload_directory():
@@ -13,39 +18,78 @@ def create_upload_directory():
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     os.makedirs(PROCESSED_DIR, exist_ok=True)
 
-# 3. Save Uploaded File Function (with Filename Collision Check):
-def save_uploaded_file(file: UploadFile) -> str:
-    """Saves an uploaded file, checking for filename collisions and retrying."""
+# 3. Save Uploaded File Function (Content-Addressed):
+def _write_temp_file(file: UploadFile) -> tuple[str, str]:
+    """Copies an upload to a temporary file in UPLOAD_DIR, hashing it as it goes.
+
+    Returns:
+        (temp_path, content_hash)
+    """
+    hasher = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := file.file.read(CHUNK_SIZE):
+                hasher.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, hasher.hexdigest()
+
+async def save_uploaded_file(file: UploadFile, allowed_extensions=ALLOWED_EXTENSIONS) -> tuple[str, str]:
+    """Saves an uploaded file under the SHA-256 of its contents.
+
+    The file is hashed while it is copied to disk, in a worker thread so large
+    uploads don't block the event loop. If a blob with the same hash already
+    exists, the new copy is discarded and the existing blob is reused.
+
+    Every call adds one reference to the blob (see `delete_file`). The reference
+    is not committed: the caller commits it together with the files row that
+    uses it, or rolls both back.
+
+    Returns:
+        (file_path, content_hash) of the stored blob.
+    """
     create_upload_directory()
 
-    # File Extension Check
-    allowed_extensions = {".xlsx", ".csv"}
+    # File Extension Check (allowed_extensions=None accepts any file)
     file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension not in allowed_extensions:
+    if allowed_extensions is not None and file_extension not in allowed_extensions:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Only {', '.join(allowed_extensions)} are allowed."
         )
 
-    # Generate Unique Filename with Collision Check
-    max_attempts = 10
-    for attempt in range(max_attempts):
-        unique_filename = f"{uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        if not os.path.exists(file_path):
-            break
-        else:
-             print(f"Filename collision detected: {unique_filename}, retrying...")
-    else:
-        raise HTTPException(
-            status_code=500, detail="Failed to generate a unique filename."
-        )
+    # Stream to a temporary file in the same directory, hashing as we go:
+    temp_path, content_hash = await run_in_threadpool(_write_temp_file, file)
+    try:
+        # Add a reference (creating the blob record for new content). The upsert
+        # keeps the blob row locked until the caller commits, so a concurrent
+        # delete_file can't remove the file in between.
+        conn, cursor = get_db_connection()
+        try:
+            cursor.execute(
+                """
+                INSERT INTO blobs (content_hash, file_path, ref_count)
+                VALUES (%s, %s, 1)
+                ON CONFLICT (content_hash) DO UPDATE SET ref_count = blobs.ref_count + 1
+                RETURNING file_path;
+                """,
+                (content_hash, os.path.join(UPLOAD_DIR, f"{content_hash}{file_extension}")),
+            )
+            file_path = cursor.fetchone()["file_path"]
+        except psycopg2.Error:
+            conn.rollback()
+            raise
 
-    # Save the file:
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        if not os.path.exists(file_path):
+            os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
-    return file_path
+    return file_path, content_hash
 
 # 4. Get File Path Functions:
 def get_file_path(filename: str) -> str:
@@ -56,14 +100,45 @@ def get_processed_file_path(filename: str) -> str:
     """Constructs the full path for a processed file (in PROCESSED_DIR)."""
     return os.path.join(PROCESSED_DIR, filename)
 
+def get_processed_filename(original_filename: str, content_hash: str = None) -> str:
+    """Name of the processed output for an upload (shared by uploads with the same content)."""
+    if content_hash is None:  # Uploads stored before content addressing
+        return f"processed_{original_filename}"
+    return f"processed_{content_hash}{os.path.splitext(original_filename)[1].lower()}"
+
 # 5. Delete File Function:
 def delete_file(file_path: str):
-    """Deletes a file."""
+    """Drops one reference to a stored file; the file is deleted with its last reference.
+
+    The file is removed while the blob row is still locked, before the deletion
+    commits, so a concurrent upload of the same content waits and then stores a
+    fresh copy instead of referencing the removed one.
+    """
+    conn, cursor = get_db_connection()
     try:
-        os.remove(file_path)
-        return True
-    except FileNotFoundError:
-        return False
-    except OSError as e:
-        print(f"Error deleting file: {e}")
+        cursor.execute(
+            "UPDATE blobs SET ref_count = ref_count - 1 WHERE file_path = %s RETURNING content_hash, ref_count;",
+            (file_path,),
+        )
+        blob = cursor.fetchone()
+        if blob and blob["ref_count"] > 0:
+            conn.commit()
+            return True  # Still referenced by other uploads
+        if blob:
+            cursor.execute("DELETE FROM blobs WHERE content_hash = %s;", (blob["content_hash"],))
+
+        try:
+            os.remove(file_path)
+            removed = True
+        except FileNotFoundError:
+            removed = False
+        except OSError as e:
+            conn.rollback()  # Keep the reference; the file is still on disk
+            print(f"Error deleting file: {e}")
+            return False
+        conn.commit()
+        return removed
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Error releasing file: {e}")
         return False
@@ -0,0 +1,81 @@
+import csv
+import os
+from itertools import islice
+from typing import Dict, Iterator, Optional
+
+SPREADSHEET_EXTENSIONS = {".xlsx", ".csv"}
+CHUNK_SIZE = 1000  # Rows parsed per batch
+
+# Spreadsheet column holding each utterance field. Override per call, or with e.g.
+# TRANSCRIPT_COLUMNS="speaker=Speaker,text=Utterance,timestamp=Start".
+DEFAULT_COLUMN_MAPPING = {"speaker": "speaker", "text": "text", "timestamp": "timestamp"}
+
+def parse_column_mapping(spec: Optional[str]) -> Dict[str, str]:
+    """Parses a "field=Column,field=Column" string into a column mapping."""
+    mapping = dict(DEFAULT_COLUMN_MAPPING)
+    for item in (spec or "").split(","):
+        if "=" in item:
+            field, column = item.split("=", 1)
+            mapping[field.strip()] = column.strip()
+    return mapping
+
+COLUMN_MAPPING = parse_column_mapping(os.getenv("TRANSCRIPT_COLUMNS"))
+
+def _iter_rows(path: str) -> Iterator[tuple]:
+    """Yields the rows of an XLSX (first sheet) or CSV file, header row first."""
+    file_extension = os.path.splitext(path)[1].lower()
+    if file_extension == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+    elif file_extension == ".xlsx":
+        import openpyxl  # Only needed for spreadsheets; keeps imports of this module light
+
+        workbook = openpyxl.load_workbook(path, read_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported transcript type: {file_extension}")
+
+def _json_value(value):
+    """Converts spreadsheet dates/times to ISO strings so utterances stay JSON-serializable."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+def iter_utterance_chunks(path: str, column_mapping: Optional[Dict[str, str]] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[list]:
+    """
+    Parses an XLSX/CSV transcript into lists of at most `chunk_size` utterances
+    in the format `process_transcript` expects ({"speaker", "text", "timestamp"}).
+    Rows without text are skipped.
+    """
+    mapping = {**COLUMN_MAPPING, **(column_mapping or {})}
+    rows = _iter_rows(path)
+    header = next(rows, None) or ()
+    columns = {str(name).strip().lower(): i for i, name in enumerate(header) if name is not None}
+
+    positions = {}
+    for field, column in mapping.items():
+        if column.strip().lower() in columns:
+            positions[field] = columns[column.strip().lower()]
+    if "text" not in positions:
+        raise ValueError(f"Transcript {os.path.basename(path)} has no '{mapping['text']}' column.")
+
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        chunk = []
+        for row in batch:
+            values = {field: _json_value(row[i]) if i < len(row) else None for field, i in positions.items()}
+            text = values["text"]
+            if text is None or not str(text).strip():
+                continue
+            values["text"] = str(text)
+            chunk.append(values)
+        if chunk:
+            yield chunk
+
+def iter_utterances(path: str, column_mapping: Optional[Dict[str, str]] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Streams the utterances of an XLSX/CSV transcript one at a time."""
+    for chunk in iter_utterance_chunks(path, column_mapping, chunk_size):
+        yield from chunk
@@ -1,8 +1,9 @@
 import uuid
-from app.database import cursor, conn
+from app.database import get_db_connection
 
 def create_job(user_id: str) -> str:
     """Create a new job entry and return the job ID."""
+    conn, cursor = get_db_connection()
     job_id = str(uuid.uuid4())
     cursor.execute("INSERT INTO jobs (id, user_id, status, progress) VALUES (%s, %s, 'pending', 0.0);",
                    (job_id, user_id))
@@ -11,6 +12,7 @@ def create_job(user_id: str) -> str:
 
 def update_job_progress(job_id: str):
     """Updates the job progress based on the number of processed files."""
+    conn, cursor = get_db_connection()
     cursor.execute("SELECT COUNT(*) FROM files WHERE job_id = %s;", (job_id,))
     total_files = cursor.fetchone()[0]
 
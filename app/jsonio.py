@@ -0,0 +1,55 @@
+import datetime
+import json
+import os
+import uuid
+
+# orjson is used when installed; set JSON_BACKEND=json to force the standard library.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.getenv("JSON_BACKEND", "orjson") == "json":
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson.JSONDecodeError subclasses this, so one except clause covers both backends.
+JSONDecodeError = json.JSONDecodeError
+
+def _default(obj):
+    """Encodes the types orjson handles natively (dates, times, UUIDs) for the stdlib backend."""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def loads(data):
+    """Parses JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumpb(obj, indent: bool = False) -> bytes:
+    """Serializes `obj` to UTF-8 JSON bytes: compact, or indented by 2 spaces for reading."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_default).encode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+def dumps(obj, indent: bool = False) -> str:
+    """Serializes `obj` to a JSON string (see `dumpb`)."""
+    return dumpb(obj, indent).decode()
+
+def load(path: str):
+    """Reads a JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+def dump(obj, path: str, indent: bool = False):
+    """Writes `obj` to a JSON file, compact unless `indent` is set."""
+    with open(path, "wb") as f:
+        f.write(dumpb(obj, indent))
@@ -1,7 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routes import router  # Import all routes
+from app.database import get_db_connection, close_db_connection
+from app.file_handler import create_upload_directory
+from app.processing import check_analysis_config, shutdown_executor
 
-app = FastAPI()
+# Schema setup is a separate one-shot step (python -m app.models), run before the
+# workers start; see railway.toml.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connects to the database and prepares storage when a worker starts (shared with main_web.py)."""
+    check_analysis_config()
+    get_db_connection()
+    create_upload_directory()
+    yield
+    shutdown_executor()
+    close_db_connection()
+
+app = FastAPI(lifespan=lifespan)
 
 # Include routes from `routes.py`
 app.include_router(router)
@@ -1,37 +1,105 @@
-from app.database import cursor, conn
-
-# Create a new table for jobs
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS jobs (
-        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-        user_id TEXT NOT NULL,
-        status TEXT DEFAULT 'pending',  -- Status: pending, processing, completed
-        progress FLOAT DEFAULT 0.0,  -- Progress percentage (0-100)
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-''')
-
-# Ensure necessary tables exist
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS projects (
-        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-        job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
-        user_id TEXT NOT NULL,
-        project_name TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS files (
-        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-        project_id UUID REFERENCES projects(id) ON DELETE CASCADE,
-        job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
-        file_name TEXT NOT NULL,
-        status TEXT DEFAULT 'pending',
-        processed_at TIMESTAMP,
-        results JSONB,
-        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-''')
-conn.commit()
+from app.database import get_db_connection
+
+# Schema setup runs once per deploy, before the web workers start (Railway's
+# pre-deploy command, see railway.toml):
+#     python -m app.models
+SCHEMA_LOCK_ID = 7283010  # pg_advisory_xact_lock key serializing concurrent schema setup
+
+def create_tables():
+    """Creates or updates every table, index and view used by the app."""
+    conn, cursor = get_db_connection()
+
+    # Another process running this at the same time waits here until we commit
+    cursor.execute('SELECT pg_advisory_xact_lock(%s);', (SCHEMA_LOCK_ID,))
+
+    # Create a new table for jobs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            user_id TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',  -- Status: pending, processing, completed
+            progress FLOAT DEFAULT 0.0,  -- Progress percentage (0-100)
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+
+    # Ensure necessary tables exist
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
+            user_id TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS files (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            project_id UUID REFERENCES projects(id) ON DELETE CASCADE,
+            job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
+            file_name TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            processed_at TIMESTAMP,
+            results JSONB,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    # Databases first set up by main_web.py predate the job columns
+    cursor.execute('ALTER TABLE projects ADD COLUMN IF NOT EXISTS job_id UUID REFERENCES jobs(id) ON DELETE CASCADE;')
+    cursor.execute('ALTER TABLE files ADD COLUMN IF NOT EXISTS job_id UUID REFERENCES jobs(id) ON DELETE CASCADE;')
+
+    # Uploads are stored once per content hash; ref_count tracks how many files rows use each blob
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS blobs (
+            content_hash TEXT PRIMARY KEY,  -- SHA-256 of the file contents
+            file_path TEXT NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    cursor.execute('ALTER TABLE files ADD COLUMN IF NOT EXISTS content_hash TEXT;')
+    cursor.execute('CREATE INDEX IF NOT EXISTS files_content_hash_idx ON files (content_hash, status);')
+
+    # One row per argument found in a processed transcript (bulk loaded with COPY)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS arguments (
+            id BIGSERIAL PRIMARY KEY,
+            file_id UUID NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+            utterance_index INTEGER NOT NULL,
+            proposal TEXT NOT NULL DEFAULT '',
+            argument TEXT NOT NULL,
+            stance TEXT NOT NULL DEFAULT 'unknown'  -- Stance: for, against, unknown
+        );
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS arguments_file_id_idx ON arguments (file_id, utterance_index);')
+    cursor.execute('CREATE INDEX IF NOT EXISTS arguments_proposal_idx ON arguments (proposal, stance);')
+
+    # Per-transcript aggregates, refreshed one file at a time whenever its arguments are (re)loaded
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transcript_argument_counts (
+            file_id UUID NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+            proposal TEXT NOT NULL,
+            stance TEXT NOT NULL,
+            argument_count INTEGER NOT NULL,
+            PRIMARY KEY (file_id, proposal, stance)
+        );
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS transcript_argument_counts_proposal_idx ON transcript_argument_counts (proposal, stance);')
+
+    # Per-proposal aggregates, rolled up from the (small) per-transcript table so they never go stale
+    cursor.execute('''
+        CREATE OR REPLACE VIEW proposal_argument_counts AS
+        SELECT proposal,
+               stance,
+               SUM(argument_count)::INTEGER AS argument_count,
+               COUNT(DISTINCT file_id)::INTEGER AS transcript_count
+        FROM transcript_argument_counts
+        GROUP BY proposal, stance;
+    ''')
+    conn.commit()
+
+if __name__ == "__main__":
+    create_tables()
+    print("Database schema is up to date.")
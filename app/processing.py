@@ -1,11 +1,121 @@
-import openpyxl  # For XLSX processing
 import shutil #for CSV processing
 import os
+import asyncio
+import multiprocessing
+import resource
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Spreadsheet work runs in a separate process pool so it never blocks the event loop.
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+# Address-space limit for each worker (one file at a time per worker); 0 disables it.
+PROCESSING_MEMORY_LIMIT_MB = int(os.getenv("PROCESSING_MEMORY_LIMIT_MB", "2048"))
+# Proposals workbook for transcript analysis; uploads are only analyzed when it is set.
+PROPOSALS_FILE = os.getenv("PROPOSALS_FILE")
+MAX_CONCURRENT_UTTERANCES = int(os.getenv("MAX_CONCURRENT_UTTERANCES", "50"))
+# Transcript analysis takes minutes (mostly waiting on the API), so it gets its own
+# process pool, with the same memory limit, and never occupies the spreadsheet workers.
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+
+_executor = None
+_analysis_executor = None
+
+def _limit_worker_memory(limit_mb: int):
+    """Process pool initializer: caps the worker's memory so one huge file fails alone."""
+    if limit_mb > 0:
+        limit = limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            # e.g. macOS does not support RLIMIT_AS; run without the cap rather than break the pool
+            print(f"Could not set worker memory limit: {e}")
+
+def _new_pool(max_workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),  # Keep workers small: don't fork the web process.
+        initializer=_limit_worker_memory,
+        initargs=(PROCESSING_MEMORY_LIMIT_MB,),
+    )
+
+def get_executor() -> ProcessPoolExecutor:
+    """Returns the shared processing pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = _new_pool(PROCESSING_WORKERS)
+    return _executor
+
+def get_analysis_executor() -> ProcessPoolExecutor:
+    """Returns the shared analysis pool, creating it on first use."""
+    global _analysis_executor
+    if _analysis_executor is None:
+        _analysis_executor = _new_pool(ANALYSIS_WORKERS)
+    return _analysis_executor
+
+def shutdown_executor():
+    """Stops the processing and analysis pools (called when the app shuts down)."""
+    global _executor, _analysis_executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown(wait=True, cancel_futures=True)
+        _analysis_executor = None
+
+async def run_in_worker(func, *args):
+    """Runs `func(*args)` in the processing pool and awaits the result."""
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_executor(), func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed while over its memory limit); start a fresh pool next time.
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        raise
+
+async def run_analysis(func, *args):
+    """Runs `func(*args)` in the analysis pool and awaits the result."""
+    global _analysis_executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_analysis_executor(), func, *args)
+    except BrokenProcessPool:
+        if _analysis_executor is not None:
+            _analysis_executor.shutdown(wait=False, cancel_futures=True)
+        _analysis_executor = None
+        raise
+
+def check_analysis_config():
+    """Fails fast at startup when uploads are to be analyzed but can't be."""
+    if not PROPOSALS_FILE:
+        return
+    if not os.getenv("ANTHROPIC_API_KEY"):
+        # The analyzer would otherwise fall back to the desktop keyring, which isn't installed here
+        raise RuntimeError("PROPOSALS_FILE is set, so uploads are analyzed, but ANTHROPIC_API_KEY is not.")
+    if not os.path.exists(PROPOSALS_FILE):
+        raise RuntimeError(f"PROPOSALS_FILE {PROPOSALS_FILE} does not exist.")
+
+def _copy_cell(target_sheet, cell):
+    """A read-only cell's value for a write-only sheet, keeping its number format (dates, percentages...)."""
+    number_format = getattr(cell, "number_format", None)
+    if cell.value is None or number_format in (None, "General"):
+        return cell.value
+    from openpyxl.cell import WriteOnlyCell
+
+    copy = WriteOnlyCell(target_sheet, value=cell.value)
+    copy.number_format = number_format
+    return copy
 
 def process_file(input_path: str, output_path: str) -> bool:
     """Processes an XLSX or CSV file.
 
-    For XLSX: Modifies cell A1 to "Hello World".
+    For XLSX: Modifies cell A1 of the active sheet to "Hello World". The workbook
+    is streamed row by row (read-only in, write-only out) so it is never fully
+    loaded into memory. Cell values, number formats, sheet order and the active
+    sheet are kept; other formatting (fonts, fills, merged cells, column widths,
+    sheet visibility) and chart sheets are not copied.
     For CSV: Copies the file (no modification).
 
     Args:
@@ -19,10 +129,28 @@ def process_file(input_path: str, output_path: str) -> bool:
         file_extension = os.path.splitext(input_path)[1].lower()
 
         if file_extension == ".xlsx":
-            workbook = openpyxl.load_workbook(input_path)
-            sheet = workbook.active  # Or select a specific sheet
-            sheet["A1"] = "Hello World"
-            workbook.save(output_path)
+            import openpyxl  # For XLSX processing (loaded in the worker, not the web process)
+
+            source = openpyxl.load_workbook(input_path, read_only=True)
+            try:
+                target = openpyxl.Workbook(write_only=True)
+                active_title = source.active.title  # Or select a specific sheet
+                active_index = source.sheetnames.index(active_title)
+                for sheet in source.worksheets:
+                    target_sheet = target.create_sheet(sheet.title)
+                    stamp = sheet.title == active_title
+                    for row in sheet.iter_rows():
+                        values = [_copy_cell(target_sheet, cell) for cell in row]
+                        if stamp:
+                            values[:1] = ["Hello World"]
+                            stamp = False
+                        target_sheet.append(values)
+                    if stamp:  # Empty sheet
+                        target_sheet.append(["Hello World"])
+                target.active = active_index  # Keep the sheet the user sees on open
+                target.save(output_path)
+            finally:
+                source.close()
         elif file_extension == ".csv":
             shutil.copyfile(input_path, output_path)  # Just copy CSV files
         else:
@@ -32,3 +160,47 @@ def process_file(input_path: str, output_path: str) -> bool:
     except Exception as e:
         print(f"Error processing file: {e}")  # Log errors
         return False
+
+def analyze_file(file_id: str, input_path: str, file_name: str, content_hash: str, processed_folder: str, proposals_file: str) -> int:
+    """Runs an uploaded XLSX or CSV transcript through the utterance analysis pipeline.
+
+    Utterances are parsed from the spreadsheet in chunks and streamed straight
+    into the analyzer; no intermediate JSON transcript is written. Run it with
+    `run_analysis`: the transcript is parsed, analyzed and stored in the
+    database (see `save_analysis`) inside the analysis worker, so only the
+    argument count comes back to the web process.
+
+    Args:
+        file_id: The upload's row in `files`.
+        input_path: Path to the stored upload.
+        file_name: The upload's original file name.
+        content_hash: The upload's content hash (names the output file).
+        processed_folder: Folder for the `_processed.json` output.
+        proposals_file: Proposals workbook (see `load_proposals`).
+
+    Returns:
+        The number of arguments found.
+    """
+    import main  # The analyzer is only needed inside analysis workers
+    from app.arguments import save_analysis
+    from app.database import open_db_connection
+    from app.ingestion import iter_utterances
+
+    proposals = main.load_proposals(proposals_file)
+    results = asyncio.run(
+        main.process_utterance_stream(
+            iter_utterances(input_path),
+            file_name,
+            processed_folder,
+            proposals,
+            MAX_CONCURRENT_UTTERANCES,
+            output_name=content_hash,
+            metadata={"content_hash": content_hash},
+        )
+    )
+
+    conn, cursor = open_db_connection()
+    try:
+        return save_analysis(conn, cursor, file_id, content_hash, results)
+    finally:
+        conn.close()
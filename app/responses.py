@@ -0,0 +1,8 @@
+from fastapi.responses import JSONResponse
+from app.jsonio import dumpb
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the app's JSON backend (orjson when available)."""
+
+    def render(self, content) -> bytes:
+        return dumpb(content)
@@ -1,75 +1,143 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Response
 from app.database import get_db_connection
 from app.file_handler import (
+    PROCESSED_DIR,
     save_uploaded_file,
     get_processed_file_path,
+    get_processed_filename,
 )
-from app.processing import process_file
+from app.processing import PROPOSALS_FILE, analyze_file, process_file, run_analysis, run_in_worker
+from app.responses import FastJSONResponse
 from uuid import UUID
+from typing import Optional
 import os
 from fastapi.responses import FileResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
+
+async def analyze_upload(file_id: str, file_path: str, file_name: str, content_hash: str):
+    """Background task: analyzes an uploaded transcript; the analysis worker stores its results and arguments."""
+    try:
+        await run_analysis(analyze_file, file_id, file_path, file_name, content_hash, PROCESSED_DIR, PROPOSALS_FILE)
+    except Exception as e:
+        print(f"Error analyzing file {file_id}: {e}")
+        conn, cursor = get_db_connection()
+        cursor.execute(
+            "UPDATE files SET status = 'failed' WHERE id = %s OR (content_hash = %s AND status = 'analyzing');",
+            (file_id, content_hash),
+        )
+        conn.commit()
 
 # --- Upload Multiple Files ---
 @router.post("/uploadfiles/")
-async def create_upload_files(files: list[UploadFile] = File(...)):
-    """Uploads multiple files, processes them, and records them in the DB."""
+async def create_upload_files(background_tasks: BackgroundTasks, files: list[UploadFile] = File(...)):
+    """
+    Uploads multiple files, processes them, and records them in the DB. When a
+    proposals file is configured, transcripts are then analyzed in the background
+    (status 'analyzing' until the results are stored).
+    """
     conn, cursor = get_db_connection()
     uploaded_file_ids = []
 
     for file in files:
+        file_id = None
         try:
-            # 1. Save the file (file_handler.py).
-            file_path = save_uploaded_file(file)
+            # 1. Save the file (file_handler.py); its blob reference commits with the files row.
+            file_path, content_hash = await save_uploaded_file(file)
 
-            # 2. Insert into database.
+            # 2. Same content already processed (with its analysis, when enabled)? Link to the
+            #    existing results. In-flight rows are not linked to: their worker may be gone.
             cursor.execute(
                 """
-                INSERT INTO files (file_name, status)
-                VALUES (%s, 'pending')
+                SELECT id FROM files
+                WHERE content_hash = %s AND status = 'processed' AND (results IS NOT NULL OR NOT %s)
+                ORDER BY processed_at DESC
+                LIMIT 1;
+                """,
+                (content_hash, bool(PROPOSALS_FILE)),
+            )
+            existing = cursor.fetchone()
+            if existing:
+                # Results are copied inside the database, never parsed or re-serialized here.
+                cursor.execute(
+                    """
+                    INSERT INTO files (file_name, content_hash, status, processed_at, results)
+                    SELECT %s, %s, 'processed', CURRENT_TIMESTAMP, results FROM files WHERE id = %s
+                    RETURNING id;
+                    """,
+                    (file.filename, content_hash, str(existing["id"])),
+                )
+                file_id = cursor.fetchone()["id"]
+                conn.commit()
+                uploaded_file_ids.append({"file_id": file_id, "filename": file.filename, "status": "processed", "duplicate": True})
+                continue
+
+            # 3. Insert into database.
+            cursor.execute(
+                """
+                INSERT INTO files (file_name, content_hash, status)
+                VALUES (%s, %s, 'pending')
                 RETURNING id;
                 """,
-                (file.filename,),
+                (file.filename, content_hash),
             )
             file_id = cursor.fetchone()["id"]
             conn.commit()
 
-            # 3. Process the file (processing.py).
-            output_filename = f"processed_{file.filename}"
+            # 4. Process the file (processing.py). A failure only fails this file, not the batch.
+            output_filename = get_processed_filename(file.filename, content_hash)
             output_path = get_processed_file_path(output_filename)
-            if process_file(file_path, output_path):
-                # 4. Update database (processed).
+            try:
+                processed = await run_in_worker(process_file, file_path, output_path)
+            except Exception as e:
+                print(f"Error processing file {file_id}: {e}")
+                processed = False
+
+            if processed:
+                # 5. Update database (processed), or queue the transcript analysis (arguments.py).
+                #    Rows of the same content left pending by an earlier, lost upload catch up too.
+                status = "analyzing" if PROPOSALS_FILE else "processed"
                 cursor.execute(
                     """
                     UPDATE files
-                    SET status = 'processed', processed_at = CURRENT_TIMESTAMP
-                    WHERE id = %s;
+                    SET status = %s, processed_at = CURRENT_TIMESTAMP
+                    WHERE id = %s OR (content_hash = %s AND status = 'pending');
                     """,
-                    (str(file_id),), #Convert UUID to string here too
+                    (status, str(file_id), content_hash), #Convert UUID to string here too
                 )
                 conn.commit()
+                if PROPOSALS_FILE:
+                    background_tasks.add_task(analyze_upload, str(file_id), file_path, file.filename, content_hash)
             else:
                 #If processing failed, mark as failed in database
+                status = "failed"
                 cursor.execute(
                     """
                     UPDATE files
                     SET status = 'failed'
-                    WHERE id = %s;
+                    WHERE id = %s OR (content_hash = %s AND status = 'pending');
                     """,
-                    (str(file_id),), #Convert UUID to string here too
+                    (str(file_id), content_hash), #Convert UUID to string here too
                 )
                 conn.commit()
 
 
-            uploaded_file_ids.append({"file_id": file_id, "filename": file.filename})
+            uploaded_file_ids.append({"file_id": file_id, "filename": file.filename, "status": status, "duplicate": False})
 
-        except HTTPException as e:
-            conn.rollback()
-            raise e
         except Exception as e:
+            # Record the failure and go on with the batch: the response must succeed for
+            # the analysis tasks already queued for earlier files to run.
             conn.rollback()
-            raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+            error = e.detail if isinstance(e, HTTPException) else f"An unexpected error occurred: {e}"
+            print(f"Error uploading file {file.filename}: {error}")
+            if file_id is not None:
+                try:
+                    cursor.execute("UPDATE files SET status = 'failed' WHERE id = %s;", (str(file_id),))
+                    conn.commit()
+                except Exception as db_error:
+                    conn.rollback()
+                    print(f"Error marking file {file_id} as failed: {db_error}")
+            uploaded_file_ids.append({"file_id": file_id, "filename": file.filename, "status": "failed", "duplicate": False, "error": error})
 
     return {"uploaded_files": uploaded_file_ids}
 
@@ -80,18 +148,18 @@ async def download_file(file_id: UUID):
     """Downloads a processed file by its ID."""
     conn, cursor = get_db_connection()
     cursor.execute(
-        "SELECT file_name, status FROM files WHERE id = %s;", (str(file_id),)  # Convert UUID to string
+        "SELECT file_name, content_hash, status FROM files WHERE id = %s;", (str(file_id),)  # Convert UUID to string
     )
     file_info = cursor.fetchone()
 
     if not file_info:
         raise HTTPException(status_code=404, detail="File not found")
 
-    if file_info["status"] != "processed":
+    if file_info["status"] not in ("processed", "analyzing"):  # The spreadsheet is ready before its analysis
         raise HTTPException(status_code=400, detail="File not processed yet")
 
     original_filename = file_info["file_name"]
-    processed_filename = f"processed_{original_filename}"
+    processed_filename = get_processed_filename(original_filename, file_info["content_hash"])
     file_path = get_processed_file_path(processed_filename)
 
     if not os.path.exists(file_path):
@@ -111,3 +179,51 @@ async def list_files():
     cursor.execute("SELECT id, file_name, status, uploaded_at, processed_at FROM files;")
     files = cursor.fetchall()
     return files
+
+
+# --- Argument Aggregates ---
+@router.get("/arguments/proposals")
+async def argument_counts_by_proposal():
+    """Argument and transcript counts for each proposal and stance."""
+    conn, cursor = get_db_connection()
+    cursor.execute(
+        """
+        SELECT proposal, stance, argument_count, transcript_count
+        FROM proposal_argument_counts
+        ORDER BY proposal, stance;
+        """
+    )
+    return cursor.fetchall()
+
+
+@router.get("/arguments/transcripts")
+async def argument_counts_by_transcript(proposal: Optional[str] = None):
+    """Argument counts for each transcript, optionally limited to one proposal."""
+    conn, cursor = get_db_connection()
+    query = """
+        SELECT c.file_id, f.file_name, c.proposal, c.stance, c.argument_count
+        FROM transcript_argument_counts c
+        JOIN files f ON f.id = c.file_id
+    """
+    params = ()
+    if proposal is not None:
+        query += " WHERE c.proposal = %s"
+        params = (proposal,)
+    cursor.execute(query + " ORDER BY f.file_name, c.proposal, c.stance;", params)
+    return cursor.fetchall()
+
+
+@router.get("/arguments/transcripts/{file_id}")
+async def get_transcript_arguments(file_id: UUID):
+    """Lists the arguments found in one transcript, in utterance order."""
+    conn, cursor = get_db_connection()
+    cursor.execute(
+        """
+        SELECT utterance_index, proposal, argument, stance
+        FROM arguments
+        WHERE file_id = %s
+        ORDER BY utterance_index, id;
+        """,
+        (str(file_id),),
+    )
+    return cursor.fetchall()
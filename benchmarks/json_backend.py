@@ -0,0 +1,120 @@
+"""
+JSON micro-benchmark: parse/dump speed and output size of processed transcripts.
+
+Usage (from the repository root):
+    python benchmarks/json_backend.py [--utterances 5000] [--runs 5] [processed.json ...]
+
+Without file arguments a synthetic processed transcript is generated. Compares
+the standard library (indented, as main.py used to write, and compact) with
+orjson (compact and indented) when it is installed, and the app's own
+app.jsonio.dumpb/loads under each JSON_BACKEND setting. Every variant writes
+non-ASCII text as UTF-8 (ensure_ascii=False), so sizes are comparable.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSONIO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "jsonio.py")
+
+def load_jsonio(backend: str):
+    """A separate copy of app/jsonio.py, imported with JSON_BACKEND=`backend`."""
+    previous = os.environ.get("JSON_BACKEND")
+    os.environ["JSON_BACKEND"] = backend
+    try:
+        spec = importlib.util.spec_from_file_location(f"jsonio_{backend}", JSONIO_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            del os.environ["JSON_BACKEND"]
+        else:
+            os.environ["JSON_BACKEND"] = previous
+    return module
+
+def synthetic_transcript(utterances: int) -> dict:
+    """A processed transcript shaped like main.py's output."""
+    rng = random.Random(0)
+    words = "video capture public spaces members only creators platform owners punish bad behavior privacy safety".split()
+    return {
+        "file_name": "synthetic.json",
+        "utterances": [
+            {
+                "speaker": f"Speaker {rng.randrange(12)}",
+                "text": " ".join(rng.choices(words, k=rng.randrange(10, 80))),
+                "timestamp": f"00:{i // 60 % 60:02d}:{i % 60:02d}",
+                "arguments": [
+                    f"{' '.join(rng.choices(words, k=5))} should be used because {' '.join(rng.choices(words, k=8))}."
+                    for _ in range(rng.randrange(3))
+                ],
+            }
+            for i in range(utterances)
+        ],
+    }
+
+def backends() -> dict:
+    """name -> (dump, load) for each JSON backend and output mode."""
+    result = {
+        "json indent=2": (lambda o: json.dumps(o, indent=2, ensure_ascii=False).encode(), json.loads),
+        "json compact": (lambda o: json.dumps(o, separators=(",", ":"), ensure_ascii=False).encode(), json.loads),
+    }
+    if orjson is not None:
+        result["orjson compact"] = (orjson.dumps, orjson.loads)
+        result["orjson indent=2"] = (lambda o: orjson.dumps(o, option=orjson.OPT_INDENT_2), orjson.loads)
+
+    # app.jsonio as the app uses it (BACKEND is "json" when orjson is missing, whatever the setting)
+    for setting in ("json", "orjson"):
+        jsonio = load_jsonio(setting)
+        label = f"jsonio[{jsonio.BACKEND}]"
+        if f"{label} compact" in result:
+            continue
+        result[f"{label} compact"] = (jsonio.dumpb, jsonio.loads)
+        result[f"{label} indent"] = (lambda o, dumpb=jsonio.dumpb: dumpb(o, indent=True), jsonio.loads)
+    return result
+
+def median_of(runs: int, func, arg) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Processed transcript JSON files to use instead of synthetic data")
+    parser.add_argument("--utterances", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.files:
+        documents = []
+        for path in args.files:
+            with open(path, "rb") as f:
+                documents.append(json.loads(f.read()))
+    else:
+        documents = [synthetic_transcript(args.utterances)]
+
+    if orjson is None:
+        print("orjson is not installed; only the standard library is measured.")
+
+    print(f"{'backend':<24}{'dump ms':>10}{'parse ms':>10}{'size KB':>10}{'size %':>8}")
+    baseline = None
+    for name, (dump, load) in backends().items():
+        encoded = [dump(doc) for doc in documents]
+        size = sum(len(e) for e in encoded)
+        baseline = baseline or size
+        dump_time = sum(median_of(args.runs, dump, doc) for doc in documents)
+        load_time = sum(median_of(args.runs, load, e) for e in encoded)
+        print(f"{name:<24}{dump_time * 1000:>10.2f}{load_time * 1000:>10.2f}{size / 1024:>10.1f}{100 * size / baseline:>7.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Startup-time benchmark: module import time and time to first request.
+
+Usage (from the repository root):
+    python benchmarks/startup.py [--runs 5] [--app main_web:app]
+
+Import times are measured in fresh interpreters and need no database. Time to
+first request starts uvicorn and polls GET / until it answers; it needs
+DATABASE_URL, since the app connects to the database on startup.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["app.database", "app.models", "app.routes", "app.main", "main_web", "main"]
+
+def time_import(module: str) -> float:
+    """Seconds to import `module` in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_first_request(app: str, timeout: float = 60.0) -> float:
+    """Seconds from launching uvicorn until GET / returns 200."""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("Timed out waiting for the first response")
+    finally:
+        server.terminate()
+        server.wait()
+
+def report(label: str, samples: list):
+    print(f"{label:<28} median {statistics.median(samples) * 1000:8.1f} ms   min {min(samples) * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", default="main_web:app")
+    args = parser.parse_args()
+
+    print("Import time (fresh interpreter)")
+    for module in MODULES:
+        try:
+            report(f"  import {module}", [time_import(module) for _ in range(args.runs)])
+        except RuntimeError as e:
+            print(f"  import {module:<19} failed: {e}")
+
+    print(f"Time to first request ({args.app})")
+    if not os.getenv("DATABASE_URL"):
+        print("  skipped: DATABASE_URL is not set")
+        return
+    report(f"  GET /", [time_first_request(args.app) for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
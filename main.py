@@ -1,24 +1,46 @@
 import os
-import json
 import asyncio
 import aiohttp
 from datetime import datetime, timezone
-import keyring
-from openpyxl import load_workbook
-from tkinter import Tk, filedialog
-from typing import Dict
+from typing import Dict, Iterable
 import logging
+from app.ingestion import SPREADSHEET_EXTENSIONS, iter_utterances
+from app import jsonio
+from app.arguments import normalize_arguments
+
+# keyring, openpyxl and tkinter are imported where they are used, so importing
+# this module (e.g. from the web workers) stays fast and needs no desktop setup.
 
 # Constants for Anthropic API
 API_URL = "https://api.anthropic.com/v1/messages"
-API_KEY = keyring.get_password("Anthropic_personal", "Metaverse transcripts")  # Replace with your actual API key
+API_KEY = os.getenv("ANTHROPIC_API_KEY")  # Falls back to the keyring, see get_api_key()
+
+# Processed transcripts are written as compact JSON; set INDENT_OUTPUT=1 for indented, human-readable files.
+INDENT_OUTPUT = os.getenv("INDENT_OUTPUT", "0") == "1"
 
 # Debug logging
 DEBUG = True
-LOG_FILE = f"/Users/rickyhm/Onboard/DDL-Transcript-Analyzer-1.1.2/rickys_version/debug logs/debug_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+LOG_DIR = "/Users/rickyhm/Onboard/DDL-Transcript-Analyzer-1.1.2/rickys_version/debug logs"
 
-# Configure logging
-logging.basicConfig(filename=LOG_FILE, level=logging.DEBUG if DEBUG else logging.INFO)
+def configure_logging():
+    """
+    Send debug logs to a timestamped file in LOG_DIR (called when running the script).
+    """
+    log_file = os.path.join(LOG_DIR, f"debug_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+    logging.basicConfig(filename=log_file, level=logging.DEBUG if DEBUG else logging.INFO)
+
+def get_api_key():
+    """
+    Return the Anthropic API key from ANTHROPIC_API_KEY, or from the keyring.
+    """
+    global API_KEY
+    if API_KEY is None:
+        try:
+            import keyring  # Desktop use only; not in requirements.txt
+        except ImportError:
+            raise RuntimeError("ANTHROPIC_API_KEY is not set and keyring is not installed.") from None
+        API_KEY = keyring.get_password("Anthropic_personal", "Metaverse transcripts")  # Replace with your actual API key
+    return API_KEY
 
 # Global token counters
 total_input_tokens = 0
@@ -81,12 +103,12 @@ async def make_request(payload):
             await wait_for_reset()
 
         headers = {
-            "x-api-key": API_KEY,
+            "x-api-key": get_api_key(),
             "content-type": "application/json",
             "anthropic-version": "2023-06-01",
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(json_serialize=jsonio.dumps) as session:
             async with session.post(API_URL, headers=headers, json=payload) as response:
                 if response.status == 429:  # Rate limit exceeded
                     log_debug_message("[WARN] Rate limit exceeded. Waiting for reset.")
@@ -100,7 +122,7 @@ async def make_request(payload):
                     raise Exception(f"API request failed with status {response.status}")
 
                 handle_rate_limiting(response.headers)
-                response_json = await response.json()
+                response_json = await response.json(loads=jsonio.loads)
                 return response_json
 
 async def analyze_utterance(text: str, proposals: dict) -> dict:
@@ -109,7 +131,7 @@ async def analyze_utterance(text: str, proposals: dict) -> dict:
     """
     global total_input_tokens, total_output_tokens
 
-    proposals_text = "\n".join([f"{proposal}" for proposal in proposals.items()])
+    proposals_text = "\n".join(f"{key}: {proposal}" for key, proposal in proposals.items())
 
     # Construct the prompt
     prompt = f"""
@@ -121,11 +143,9 @@ Your task is to determine if the provided text contains any arguments directly s
 
 ### Proposals
 
-Video capture should be used in members-only spaces and/or public spaces.
-Automatic speech detection should be used in members-only spaces and/or public spaces.
-Creators should be responsible for managing bad behavior in members-only spaces and/or public spaces.
-Platform owners should be responsible for managing bad behavior in members-only spaces and/or public spaces.
-Punishments should be administered for bad behavior in the Metaverse/online virtual reality spaces.
+Each proposal is listed as "key: proposal".
+
+{proposals_text}
 
 ### Definitions and Criteria
 
@@ -149,14 +169,12 @@ If the text does not provide a reason (explicitly or implicitly), do not rewrite
 
 ### Output Format
 
-If the text contains an argument with one or multiple reasons, rewrite it as a single sentence in the following format:
-"Video capture in public spaces should be used because it helps deter crime."
+Return a JSON object with an "arguments" list. Each item gives the key of the proposal the argument relates to and the argument rewritten as a single sentence:
+{{"arguments": [{{"proposal": "<proposal key>", "argument": "Video capture in public spaces should be used because it helps deter crime."}}]}}
 
-If the text contains multiple arguments for different proposals, rewrite each argument as it's own argument sentence and claim pair, grouping them using xml tags.
+If the text contains multiple arguments for different proposals, rewrite each argument as its own item in the list.
 
-<argument_sentence>
-
-If no arguments are present, return "None". Do not include any other text or explanation.
+If no arguments are present, return {{"arguments": []}}.
 
 Only return the json (with regular brackets) in your response. No other explanation or text.
 
@@ -179,7 +197,7 @@ Text:
                 "content": [
                     {
                         "type": "text",
-                        "text": "<examples>\n<example>\n<text>\nVideo capture should be used in public spaces because it helps deter crime\n</text>\n<ideal_output>\nVideo capture in public spaces should be used because it helps deter crime.\n</ideal_output>\n</example>\n<example>\n<text>\nWe need to protect people in public spaces, so I think video capture should be used.\n</text>\n<ideal_output>\nVideo capture in public spaces should be used because it helps protect people.\n</ideal_output>\n</example>\n<example>\n<example_description>\nNo argument provided because there is no justification\n</example_description>\n<text>\nI think it should be enabled.\n</text>\n<ideal_output>\nNone\n</ideal_output>\n</example>\n<example>\n<example_description>\nThe speaker does not explicitly take a position for or against the proposal and does not provide a clear justification\n</example_description>\n<text>\nVideo capture can be useful, but it depends on how it is used.\n</text>\n<ideal_output>\nNone\n</ideal_output>\n</example>\n<example>\n<text>\nI don’t think we need video capture in public spaces since it’s an invasion of privacy.\n</text>\n<ideal_output>\nVideo capture in public spaces should not be used because it invades privacy.\n</ideal_output>\n</example>\n</examples>\n\n"
+                        "text": "<examples>\n<example>\n<text>\nVideo capture should be used in public spaces because it helps deter crime\n</text>\n<ideal_output>\n{\"arguments\": [{\"proposal\": \"<video capture proposal key>\", \"argument\": \"Video capture in public spaces should be used because it helps deter crime.\"}]}\n</ideal_output>\n</example>\n<example>\n<text>\nWe need to protect people in public spaces, so I think video capture should be used.\n</text>\n<ideal_output>\n{\"arguments\": [{\"proposal\": \"<video capture proposal key>\", \"argument\": \"Video capture in public spaces should be used because it helps protect people.\"}]}\n</ideal_output>\n</example>\n<example>\n<example_description>\nNo argument provided because there is no justification\n</example_description>\n<text>\nI think it should be enabled.\n</text>\n<ideal_output>\n{\"arguments\": []}\n</ideal_output>\n</example>\n<example>\n<example_description>\nThe speaker does not explicitly take a position for or against the proposal and does not provide a clear justification\n</example_description>\n<text>\nVideo capture can be useful, but it depends on how it is used.\n</text>\n<ideal_output>\n{\"arguments\": []}\n</ideal_output>\n</example>\n<example>\n<text>\nI don’t think we need video capture in public spaces since it’s an invasion of privacy.\n</text>\n<ideal_output>\n{\"arguments\": [{\"proposal\": \"<video capture proposal key>\", \"argument\": \"Video capture in public spaces should not be used because it invades privacy.\"}]}\n</ideal_output>\n</example>\n</examples>\n\n"
                     },
                     {
                         "type": "text",
@@ -218,14 +236,15 @@ def load_proposals(proposal_file: str) -> Dict[str, str]:
     """
     Load proposals from an Excel file.
     """
-    wb = load_workbook(proposal_file)
+    from openpyxl import load_workbook
+
+    wb = load_workbook(proposal_file, read_only=True)
     proposal_ws = wb["proposals"]
     proposals = {}
-    for row in range(2, proposal_ws.max_row + 1):
-        key = proposal_ws.cell(row=row, column=1).value
-        proposal = proposal_ws.cell(row=row, column=2).value
+    for key, proposal in proposal_ws.iter_rows(min_row=2, max_col=2, values_only=True):
         if key and proposal:
             proposals[key] = proposal
+    wb.close()
 
     if DEBUG:
         print(f"[DEBUG] Loaded proposals: {proposals}")
@@ -246,62 +265,77 @@ async def process_utterance(utterance: dict, proposals: dict, semaphore: asyncio
     # Parse result if it's a string
     if isinstance(result, str):
         try:
-            result = json.loads(result)
-        except json.JSONDecodeError as e:
+            result = jsonio.loads(result)
+        except jsonio.JSONDecodeError as e:
             print(f"[ERROR] Failed to parse result as JSON: {e}")
             result = {}
 
-    # Validate result type
+    # Validate result type; arguments become {"proposal": <key>, "argument", "stance"} items
     if isinstance(result, dict):
-        if result.get("arguments") is not None:
-            utterance["arguments"] = result["arguments"]
-        else:
-            utterance["arguments"] = []
+        utterance["arguments"] = normalize_arguments(result.get("arguments"), proposals)
     else:
         print(f"[ERROR] Unexpected result type: {type(result)}")
         utterance["arguments"] = []
-        print(f"Processed utterance {idx}")
-        return utterance
+    print(f"Processed utterance {idx}")
+    return utterance
 
 async def process_transcript(json_file_path: str, processed_folder: str, proposals: dict, max_concurrent_utterances: int):
     """
-    Process a single transcript JSON file.
+    Process a single transcript file (JSON, or an XLSX/CSV spreadsheet).
     """
-    with open(json_file_path, 'r') as f:
-        data = json.load(f)
+    if os.path.splitext(json_file_path)[1].lower() in SPREADSHEET_EXTENSIONS:
+        file_name = os.path.basename(json_file_path)
+        utterances = iter_utterances(json_file_path)
+    else:
+        data = jsonio.load(json_file_path)
+        file_name = data.get("filename", os.path.basename(json_file_path))
+        utterances = data.get("utterances", [])
 
-    file_name = data.get("filename", os.path.basename(json_file_path))
-    utterances = data.get("utterances", [])
+    return await process_utterance_stream(utterances, file_name, processed_folder, proposals, max_concurrent_utterances)
 
+async def process_utterance_stream(utterances: Iterable[dict], file_name: str, processed_folder: str, proposals: dict, max_concurrent_utterances: int,
+                                   output_name: str = None, metadata: dict = None) -> dict:
+    """
+    Analyze utterances as they are read from `utterances` (any iterable, e.g. a
+    spreadsheet parser) and save the processed transcript as
+    `<output_name or file_name>_processed.json`, with `metadata` added to it.
+    """
     semaphore = asyncio.Semaphore(max_concurrent_utterances)
 
-    tasks = [
-        process_utterance(utterance, proposals, semaphore, idx)
-        for idx, utterance in enumerate(utterances, start=1)
-    ]
+    tasks = []
+    running = set()
+    for idx, utterance in enumerate(utterances, start=1):
+        task = asyncio.create_task(process_utterance(utterance, proposals, semaphore, idx))
+        tasks.append(task)
+        running.add(task)
+        # Don't read further ahead of the analyzer than needed to keep it busy
+        if len(running) >= 2 * max_concurrent_utterances:
+            _, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
 
     processed_utterances = await asyncio.gather(*tasks)
 
     # Save processed transcript
     processed_data = {
         "file_name": file_name,
+        **(metadata or {}),
         "utterances": processed_utterances
     }
 
-    output_path = os.path.join(processed_folder, f"{os.path.splitext(file_name)[0]}_processed.json")
-    with open(output_path, 'w') as f:
-        json.dump(processed_data, f, indent=2)
+    output_path = os.path.join(processed_folder, f"{os.path.splitext(output_name or file_name)[0]}_processed.json")
+    jsonio.dump(processed_data, output_path, indent=INDENT_OUTPUT)
 
     if DEBUG:
         log_debug_message(f"[DEBUG] Processed transcript saved to {output_path}")
 
+    return processed_data
+
 async def process_all_transcripts(json_folder: str, processed_folder: str, proposals: Dict[str, str], max_concurrent_utterances: int):
     """
-    Process all transcript JSON files in the folder (including subfolders).
+    Process all transcript files (JSON, XLSX or CSV) in the folder (including subfolders).
     """
     for root, _, files in os.walk(json_folder):
         for file_name in files:
-            if file_name.endswith(".json"):
+            if os.path.splitext(file_name)[1].lower() in {".json"} | SPREADSHEET_EXTENSIONS:
                 json_file_path = os.path.join(root, file_name)
 
                 # Check if the file already exists in the output folder
@@ -314,13 +348,19 @@ async def process_all_transcripts(json_folder: str, processed_folder: str, propo
                 if DEBUG:
                     print(f"[DEBUG] Processing transcript: {json_file_path}")
 
-                await process_transcript(json_file_path, processed_folder, proposals, max_concurrent_utterances)
+                try:
+                    await process_transcript(json_file_path, processed_folder, proposals, max_concurrent_utterances)
+                except ValueError as e:
+                    # e.g. a spreadsheet in the folder that isn't a transcript (such as the proposals workbook)
+                    log_debug_message(f"[DEBUG] Skipping {file_name}: {e}")
 
 # File and folder selection functions
 def select_input():
     """
     Brings up a file dialog for the user to select a folder or file for input.
     """
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()  # Hide the main tkinter window
     root.update()
@@ -334,6 +374,8 @@ def select_output():
     """
     Brings up a file dialog for the user to select a folder for output.
     """
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()  # Hide the main tkinter window
     root.update()
@@ -347,6 +389,8 @@ async def main():
     """
     global total_input_tokens, total_output_tokens
 
+    configure_logging()
+
     # Input and output folders
     print("Please select the input folder or file.")
     json_folder = select_input()
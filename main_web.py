@@ -1,60 +1,26 @@
 from fastapi import FastAPI, File, UploadFile, Form, Depends
 from fastapi.responses import JSONResponse
-import os
-import shutil
-import uuid
 from typing import List
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import Json
 import time
 import threading
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set. Ensure it is defined in Railway.")
-
-try:
-    conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-    cursor = conn.cursor()
-except psycopg2.OperationalError as e:
-    print("Error connecting to the database:", e)
-    raise
+from app.database import get_db_connection, open_db_connection
+from app.file_handler import save_uploaded_file
+from app.main import lifespan
+from app.routes import router
+from app.jsonio import dumps
+from app.responses import FastJSONResponse
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Shared routes from app/routes.py (uploads, downloads, argument aggregates)
+app.include_router(router)
 
 @app.get("/")
 def read_root():
     return {"message": "FastAPI is running on Railway!"}
 
-# Ensure necessary tables exist in the database
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS projects (
-        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-        user_id TEXT NOT NULL,
-        project_name TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS files (
-        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-        project_id UUID REFERENCES projects(id) ON DELETE CASCADE,
-        file_name TEXT NOT NULL,
-        status TEXT DEFAULT 'pending',
-        processed_at TIMESTAMP,
-        results JSONB,
-        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-''')
-conn.commit()
-
-# Directory to temporarily store uploaded files
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 @app.post("/upload/")
 async def upload_files(
     user_id: str = Form(...), 
@@ -62,6 +28,7 @@ async def upload_files(
     files: List[UploadFile] = File(...)
 ):
     """Handles file/folder uploads, creates a project record, and logs each file."""
+    conn, cursor = get_db_connection()
     try:
         # Create a new project entry in the database
         cursor.execute("INSERT INTO projects (user_id, project_name) VALUES (%s, %s) RETURNING id;", (user_id, project_name))
@@ -70,49 +37,83 @@ async def upload_files(
 
         file_records = []
         for file in files:
-            file_id = str(uuid.uuid4())
-            file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Insert file record into database
-            cursor.execute("INSERT INTO files (id, project_id, file_name, status) VALUES (%s, %s, %s, 'pending');",
-                           (file_id, project_id, file.filename))
+            # Store by content hash; identical uploads share one copy (the reference commits with the row below)
+            file_path, content_hash = await save_uploaded_file(file, allowed_extensions=None)
+
+            # Link to existing results if this content was already processed
+            cursor.execute("SELECT id FROM files WHERE content_hash = %s AND status = 'processed' AND results IS NOT NULL ORDER BY processed_at DESC LIMIT 1;",
+                           (content_hash,))
+            existing = cursor.fetchone()
+            if existing:
+                # Copy results inside the database instead of round-tripping the JSON through Python
+                cursor.execute("INSERT INTO files (project_id, file_name, content_hash, status, processed_at, results) SELECT %s, %s, %s, 'processed', NOW(), results FROM files WHERE id = %s RETURNING id;",
+                               (project_id, file.filename, content_hash, existing["id"]))
+            else:
+                # Pending copies of the same content in a project are processed once (see process_project)
+                cursor.execute("INSERT INTO files (project_id, file_name, content_hash, status) VALUES (%s, %s, %s, 'pending') RETURNING id;",
+                               (project_id, file.filename, content_hash))
+            file_id = cursor.fetchone()["id"]
             conn.commit()
-            file_records.append({"file_id": file_id, "file_name": file.filename})
+            file_records.append({"file_id": file_id, "file_name": file.filename, "duplicate": existing is not None})
         
         return {"message": "Files uploaded successfully", "project_id": project_id, "files": file_records}
     except Exception as e:
+        conn.rollback()
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 # Mock file processing function
-def process_file(file_id: str):
+def process_file(file_id: str, content_hash: str):
     """Mock function that simulates transcript processing and updates DB."""
-    time.sleep(5)  # Simulate processing delay
-    summary = f"Mock summary of file {file_id}"
-    
-    cursor.execute("UPDATE files SET status = 'processed', processed_at = NOW(), results = %s WHERE id = %s;",
-                   (json.dumps({"summary": summary}), file_id))
-    conn.commit()
+    # Runs in its own thread, so it gets its own connection (see open_db_connection)
+    conn, cursor = open_db_connection()
+    try:
+        time.sleep(5)  # Simulate processing delay
+        summary = f"Mock summary of file {file_id}"
+
+        # Every unfinished upload of the same content gets the same results
+        cursor.execute("UPDATE files SET status = 'processed', processed_at = NOW(), results = %s WHERE id = %s OR (content_hash = %s AND status IN ('pending', 'processing'));",
+                       (Json({"summary": summary}, dumps=dumps), file_id, content_hash))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Error processing file {file_id}: {e}")
+        cursor.execute("UPDATE files SET status = 'failed' WHERE id = %s;", (file_id,))
+        conn.commit()
+    finally:
+        conn.close()
 
 @app.post("/process/{project_id}")
 async def process_project(project_id: str):
     """Triggers processing for all pending files in a given project."""
-    cursor.execute("SELECT id FROM files WHERE project_id = %s AND status = 'pending';", (project_id,))
+    conn, cursor = get_db_connection()
+    # Claim one pending file per content hash; the project's other copies get its results
+    # when it finishes
+    cursor.execute("""
+        UPDATE files SET status = 'processing'
+        WHERE id IN (
+            SELECT DISTINCT ON (COALESCE(content_hash, id::TEXT)) id
+            FROM files
+            WHERE project_id = %s AND status = 'pending'
+            ORDER BY COALESCE(content_hash, id::TEXT), uploaded_at
+        )
+        RETURNING id, content_hash;
+    """, (project_id,))
     files = cursor.fetchall()
+    conn.commit()
     
     if not files:
         return {"message": "No pending files to process."}
     
     # Start processing each file in a separate thread
     for file in files:
-        threading.Thread(target=process_file, args=(file["id"],)).start()
+        threading.Thread(target=process_file, args=(file["id"], file["content_hash"])).start()
     
     return {"message": "Processing started for all pending files."}
 
 @app.get("/results/{project_id}")
 async def get_results(project_id: str):
     """Fetches processing results for all files in a given project."""
+    conn, cursor = get_db_connection()
     cursor.execute("SELECT file_name, status, results FROM files WHERE project_id = %s;", (project_id,))
     records = cursor.fetchall()
     return {"project_id": project_id, "results": records}
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from app import jsonio
+from app.analytics import ArgumentCorpus
+
+PROPOSALS = {"P1": "Ban cars downtown", "P2": "Expand bike lanes"}
+
+def write_processed(folder, file_name, arguments_per_utterance, mtime=None, output_name=None):
+    """Writes a `_processed.json` transcript with one utterance per entry of `arguments_per_utterance`."""
+    data = {
+        "file_name": file_name,
+        "utterances": [
+            {"speaker": f"S{i % 2}", "text": "...", "arguments": arguments}
+            for i, arguments in enumerate(arguments_per_utterance)
+        ],
+    }
+    path = os.path.join(folder, f"{os.path.splitext(output_name or file_name)[0]}_processed.json")
+    jsonio.dump(data, path)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return path
+
+def argument(proposal, text, stance="for"):
+    return {"proposal": proposal, "argument": text, "stance": stance}
+
+@pytest.fixture
+def corpus(tmp_path):
+    write_processed(tmp_path, "a.xlsx", [[argument("P1", "Cleaner air")], [], [argument("P2", "Safer", "against")]])
+    write_processed(tmp_path, "b.xlsx", [[argument("P1", "Quieter streets")]])
+    return ArgumentCorpus(str(tmp_path), PROPOSALS)
+
+def test_refresh_loads_every_processed_file(corpus):
+    assert corpus.refresh() == 2
+    assert len(corpus.arguments) == 3
+    assert corpus.transcripts["utterance_count"].to_dict() == {"a_processed.json": 3, "b_processed.json": 1}
+    assert corpus.transcripts["file_name"].to_dict() == {"a_processed.json": "a.xlsx", "b_processed.json": "b.xlsx"}
+    assert corpus.arguments["proposal"].dtype == "category"
+
+def test_refresh_skips_unchanged_files(corpus):
+    corpus.refresh()
+    assert corpus.refresh() == 0
+    assert len(corpus.arguments) == 3
+
+def test_refresh_reloads_only_changed_files(corpus, tmp_path):
+    corpus.refresh()
+    path = write_processed(tmp_path, "a.xlsx", [[argument("P2", "Faster commutes")]], mtime=1)
+    write_processed(tmp_path, "c.xlsx", [[argument("P2", "More cyclists")]])
+
+    assert corpus.refresh() == 2
+    by_file = corpus.arguments.groupby("file_name", observed=True)["argument"].apply(list).to_dict()
+    assert by_file == {"a.xlsx": ["Faster commutes"], "b.xlsx": ["Quieter streets"], "c.xlsx": ["More cyclists"]}
+    assert corpus.transcripts.loc["a_processed.json", "utterance_count"] == 1
+
+    os.utime(path, ns=(2, 2))
+    assert corpus.refresh() == 1
+    assert len(corpus.arguments) == 3
+
+def test_transcripts_sharing_a_file_name_stay_separate(tmp_path):
+    write_processed(tmp_path, "t.xlsx", [[argument("P1", "arg aaa")]], output_name="aaa")
+    write_processed(tmp_path, "t.xlsx", [[argument("P1", "arg bbb")], []], output_name="bbb")
+    corpus = ArgumentCorpus(str(tmp_path), PROPOSALS)
+    corpus.refresh()
+
+    write_processed(tmp_path, "t.xlsx", [[argument("P2", "arg aaa2")]], mtime=1, output_name="aaa")
+    assert corpus.refresh() == 1
+    assert sorted(corpus.arguments["argument"]) == ["arg aaa2", "arg bbb"]
+    assert corpus.transcripts["utterance_count"].to_dict() == {"aaa_processed.json": 1, "bbb_processed.json": 2}
+    assert corpus.coverage().set_index("proposal").loc["P1", "transcripts"] == 1
+    assert set(corpus.timeline()["transcript"]) == {"aaa_processed.json", "bbb_processed.json"}
+
+def test_refresh_drops_deleted_files(corpus, tmp_path):
+    corpus.refresh()
+    os.remove(tmp_path / "a_processed.json")
+    assert corpus.refresh() == 0
+    assert list(corpus.arguments["argument"]) == ["Quieter streets"]
+    assert list(corpus.transcripts.index) == ["b_processed.json"]
+    assert corpus.refresh() == 0
+
+def test_plain_string_arguments_are_matched_to_proposals(tmp_path):
+    write_processed(tmp_path, "a.xlsx", [["P2: We should expand bike lanes", "Ban cars downtown now"]])
+    corpus = ArgumentCorpus(str(tmp_path), PROPOSALS)
+    corpus.refresh()
+    assert sorted(corpus.arguments["proposal"].astype(str)) == ["P1", "P2"]
+
+def test_coverage_lists_every_proposal(corpus):
+    corpus.refresh()
+    coverage = corpus.coverage().set_index("proposal")
+    assert list(coverage.index) == ["P1", "P2"]
+    assert coverage.loc["P1", "arguments"] == 2
+    assert coverage.loc["P1", "coverage"] == 1.0
+    assert coverage.loc["P2", "text"] == "Expand bike lanes"
+
+def test_empty_folder(tmp_path):
+    corpus = ArgumentCorpus(str(tmp_path))
+    assert corpus.refresh() == 0
+    assert corpus.argument_counts().empty
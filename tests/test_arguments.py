@@ -0,0 +1,117 @@
+import csv
+import io
+
+import pytest
+
+from app.arguments import ARGUMENT_COLUMNS, infer_stance, load_arguments, normalize_arguments, proposal_matcher
+
+PROPOSALS = {
+    "P1": "Video capture in public spaces should be allowed",
+    "P2": "Platform owners should punish bad behavior in public spaces",
+    "P3": "Only members should create content",
+}
+
+@pytest.mark.parametrize("text, stance", [
+    ("Cameras should be allowed because they deter crime.", "for"),
+    ("Cameras should not be allowed because of privacy.", "against"),
+    ("Cameras shouldn't be allowed because of privacy.", "against"),
+    ("Cameras are everywhere because they are cheap.", "unknown"),
+    ("Cameras are cheap because people say they should be.", "unknown"),  # Only the claim counts
+])
+def test_infer_stance(text, stance):
+    assert infer_stance(text) == stance
+
+def test_matcher_accepts_keys_and_proposal_text():
+    match = proposal_matcher(PROPOSALS)
+    assert match("P2", "anything") == "P2"
+    assert match("  only members should create content ", "anything") == "P3"
+
+def test_matcher_uses_the_claim_and_rare_words():
+    match = proposal_matcher(PROPOSALS)
+    # "public spaces" appears in two proposals, so "punish" decides
+    assert match(None, "Bad behavior in public spaces should be punished because it drives people away.") == "P2"
+    # The claim names P1; the reasons mention members
+    assert match(None, "Video capture should be allowed because members feel safer.") == "P1"
+
+def test_matcher_returns_empty_on_ties_and_misses():
+    match = proposal_matcher(PROPOSALS)
+    assert match(None, "Public spaces matter because everyone uses them.") == ""
+    assert match(None, "Taxes should be lower because prices are high.") == ""
+    assert match("Q9", "Taxes should be lower because prices are high.") == "Q9"
+    assert proposal_matcher({})(None, "Anything at all.") == ""
+
+def test_matcher_ignores_unhashable_references():
+    match = proposal_matcher(PROPOSALS)
+    assert match(["P1"], "Video capture should be allowed because it helps.") == "P1"
+    assert match({"key": "P1"}, "Taxes should be lower because prices are high.") == ""
+
+def test_normalize_arguments_dicts_and_sentences():
+    arguments = normalize_arguments([
+        {"proposal": "P3", "argument": "Members should create content because of quality.", "stance": "AGAINST"},
+        "Video capture should not be allowed because of privacy.",
+        {"text": "Owners should punish bad behavior because it helps.", "stance": "maybe"},
+    ], PROPOSALS)
+    assert arguments == [
+        {"proposal": "P3", "argument": "Members should create content because of quality.", "stance": "against"},
+        {"proposal": "P1", "argument": "Video capture should not be allowed because of privacy.", "stance": "against"},
+        {"proposal": "P2", "argument": "Owners should punish bad behavior because it helps.", "stance": "for"},
+    ]
+
+@pytest.mark.parametrize("output", [None, "None", {"proposal": "P1", "argument": "x"}, 3, [None, 3, "", "  ", {"argument": ["x"]}]])
+def test_normalize_arguments_drops_malformed_output(output):
+    assert normalize_arguments(output, PROPOSALS) == []
+
+class FakeCursor:
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.copied = None
+        self.fail_on = fail_on
+
+    def execute(self, query, params=()):
+        self.statements.append((" ".join(query.split()), params))
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError("database error")
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append((sql, None))
+        self.copied = buffer.read()
+
+class FakeConnection:
+    def __init__(self):
+        self.actions = []
+
+    def commit(self):
+        self.actions.append("commit")
+
+    def rollback(self):
+        self.actions.append("rollback")
+
+PROCESSED = {
+    "utterances": [
+        {"speaker": "A", "text": "...", "arguments": ['Members should create content because, "quality" matters.']},
+        {"speaker": "B", "text": "...", "arguments": []},
+        "not an utterance",
+        {"speaker": "C", "text": "...", "arguments": [{"proposal": "P1", "argument": "Capture should not be allowed because privacy."}]},
+    ],
+}
+
+def test_load_arguments_copies_csv_rows():
+    conn, cursor = FakeConnection(), FakeCursor()
+    assert load_arguments(conn, cursor, "file-1", PROCESSED, PROPOSALS) == 2
+
+    rows = list(csv.reader(io.StringIO(cursor.copied)))
+    assert rows == [
+        ["file-1", "1", "P3", 'Members should create content because, "quality" matters.', "for"],
+        ["file-1", "4", "P1", "Capture should not be allowed because privacy.", "against"],
+    ]
+    copy_sql = next(sql for sql, params in cursor.statements if sql.startswith("COPY"))
+    assert f"({', '.join(ARGUMENT_COLUMNS)})" in copy_sql
+    assert cursor.statements[0] == ("DELETE FROM transcript_argument_counts WHERE file_id = %s;", ("file-1",))
+    assert cursor.statements[-1][0].startswith("INSERT INTO transcript_argument_counts")
+    assert conn.actions == ["commit"]
+
+def test_load_arguments_rolls_back_on_error():
+    conn, cursor = FakeConnection(), FakeCursor(fail_on="INSERT INTO transcript_argument_counts")
+    with pytest.raises(RuntimeError):
+        load_arguments(conn, cursor, "file-1", PROCESSED, PROPOSALS)
+    assert conn.actions == ["rollback"]
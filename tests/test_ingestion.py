@@ -0,0 +1,61 @@
+import pytest
+
+from app.ingestion import iter_utterance_chunks, iter_utterances, parse_column_mapping
+
+def write_csv(tmp_path, text, name="transcript.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_parse_column_mapping_overrides_defaults():
+    mapping = parse_column_mapping("text = Utterance, speaker=Who")
+    assert mapping == {"speaker": "Who", "text": "Utterance", "timestamp": "timestamp"}
+    assert parse_column_mapping(None)["text"] == "text"
+
+def test_columns_are_matched_case_insensitively(tmp_path):
+    path = write_csv(tmp_path, "Speaker,Utterance,Start\nAlice,Hello,00:01\nBob,Hi,00:02\n")
+    utterances = list(iter_utterances(path, column_mapping={"text": "utterance", "timestamp": "START"}))
+    assert utterances == [
+        {"speaker": "Alice", "text": "Hello", "timestamp": "00:01"},
+        {"speaker": "Bob", "text": "Hi", "timestamp": "00:02"},
+    ]
+
+def test_missing_optional_columns_are_left_out(tmp_path):
+    path = write_csv(tmp_path, "text\nOnly text\n")
+    assert list(iter_utterances(path)) == [{"text": "Only text"}]
+
+def test_rows_are_batched_and_blank_text_skipped(tmp_path):
+    rows = "".join(f"S{i},{'' if i % 3 == 0 else f'line {i}'}\n" for i in range(10))
+    path = write_csv(tmp_path, "speaker,text\n" + rows)
+    chunks = list(iter_utterance_chunks(path, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [2, 3, 1]
+    assert [u["text"] for chunk in chunks for u in chunk] == [f"line {i}" for i in range(10) if i % 3]
+
+def test_xlsx_transcript(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["speaker", "text"])
+    sheet.append(["Alice", "From a workbook"])
+    path = str(tmp_path / "transcript.xlsx")
+    workbook.save(path)
+    assert list(iter_utterances(path)) == [{"speaker": "Alice", "text": "From a workbook"}]
+
+def test_missing_text_column_raises(tmp_path):
+    path = write_csv(tmp_path, "speaker,words\nAlice,Hello\n")
+    with pytest.raises(ValueError, match="no 'text' column"):
+        list(iter_utterances(path))
+
+def test_empty_file_raises(tmp_path):
+    path = write_csv(tmp_path, "")
+    with pytest.raises(ValueError, match="no 'text' column"):
+        list(iter_utterance_chunks(path))
+
+def test_header_only_file_has_no_utterances(tmp_path):
+    path = write_csv(tmp_path, "speaker,text\n")
+    assert list(iter_utterance_chunks(path)) == []
+
+def test_unsupported_type_raises(tmp_path):
+    path = write_csv(tmp_path, "text\nHello\n", name="transcript.txt")
+    with pytest.raises(ValueError, match="Unsupported transcript type"):
+        list(iter_utterances(path))
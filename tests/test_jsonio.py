@@ -0,0 +1,66 @@
+import datetime
+import decimal
+import importlib
+import json
+import uuid
+
+import pytest
+
+from app import jsonio
+
+@pytest.fixture(params=["json", "orjson"])
+def backend(request, monkeypatch):
+    """app.jsonio reloaded with JSON_BACKEND set to each backend."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    monkeypatch.setenv("JSON_BACKEND", request.param)
+    module = importlib.reload(jsonio)
+    assert module.BACKEND == request.param
+    yield module
+    monkeypatch.undo()
+    importlib.reload(jsonio)
+
+DOCUMENT = {"file_name": "café.xlsx", "utterances": [{"speaker": "A", "arguments": []}], "count": 2, "empty": {}}
+
+def test_dumpb_compact(backend):
+    assert backend.dumpb(DOCUMENT) == json.dumps(DOCUMENT, separators=(",", ":"), ensure_ascii=False).encode()
+
+def test_dumpb_indent(backend):
+    assert backend.dumpb(DOCUMENT, indent=True) == json.dumps(DOCUMENT, indent=2, ensure_ascii=False).encode()
+    assert backend.dumps(DOCUMENT, indent=True) == json.dumps(DOCUMENT, indent=2, ensure_ascii=False)
+
+def test_loads_str_and_bytes(backend):
+    encoded = backend.dumpb(DOCUMENT)
+    assert backend.loads(encoded) == DOCUMENT
+    assert backend.loads(encoded.decode()) == DOCUMENT
+
+def test_dates_and_uuids(backend):
+    value = {
+        "at": datetime.datetime(2024, 5, 1, 12, 30, 15),
+        "on": datetime.date(2024, 5, 1),
+        "time": datetime.time(9, 5),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    }
+    assert backend.loads(backend.dumpb(value)) == {
+        "at": "2024-05-01T12:30:15",
+        "on": "2024-05-01",
+        "time": "09:05:00",
+        "id": "12345678-1234-5678-1234-567812345678",
+    }
+
+@pytest.mark.parametrize("value", [{1, 2}, decimal.Decimal("1.5"), object()])
+def test_unsupported_types_raise(backend, value):
+    with pytest.raises(TypeError):
+        backend.dumpb({"value": value})
+
+@pytest.mark.parametrize("text", ["{", "", "[1,]", "{'a': 1}"])
+def test_decode_errors_share_one_exception(backend, text):
+    with pytest.raises(backend.JSONDecodeError):
+        backend.loads(text)
+
+def test_dump_and_load_files(backend, tmp_path):
+    path = str(tmp_path / "transcript_processed.json")
+    backend.dump(DOCUMENT, path)
+    assert backend.load(path) == DOCUMENT
+    backend.dump(DOCUMENT, path, indent=True)
+    assert backend.load(path) == DOCUMENT
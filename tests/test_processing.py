@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+
+from app.processing import process_file
+
+openpyxl = pytest.importorskip("openpyxl")
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.title = "Notes"
+    first.append(["note"])
+    first.append(["keep me"])
+
+    data = workbook.create_sheet("Data")
+    data.append(["original", "speaker", "when", "share"])
+    data.append([1, "Alice", datetime.datetime(2024, 5, 1, 9, 30), 0.25])
+    data["C2"].number_format = "dd/mm/yyyy hh:mm"
+    data["D2"].number_format = "0.0%"
+
+    workbook.create_sheet("Empty")
+    workbook.active = 1  # "Data"
+    path = tmp_path / "input.xlsx"
+    workbook.save(path)
+    return str(path)
+
+def test_xlsx_stamps_the_active_sheet_and_keeps_the_rest(workbook_path, tmp_path):
+    output_path = str(tmp_path / "output.xlsx")
+    assert process_file(workbook_path, output_path)
+
+    result = openpyxl.load_workbook(output_path)
+    assert result.sheetnames == ["Notes", "Data", "Empty"]
+    assert result.active.title == "Data"
+
+    data = result["Data"]
+    assert [cell.value for cell in data[1]] == ["Hello World", "speaker", "when", "share"]
+    assert [cell.value for cell in data[2]] == [1, "Alice", datetime.datetime(2024, 5, 1, 9, 30), 0.25]
+    assert data["C2"].number_format == "dd/mm/yyyy hh:mm"
+    assert data["D2"].number_format == "0.0%"
+
+    assert [[cell.value for cell in row] for row in result["Notes"].iter_rows()] == [["note"], ["keep me"]]
+    assert result["Empty"].max_row == 1 and result["Empty"]["A1"].value is None
+
+def test_empty_active_sheet_gets_the_stamp(tmp_path):
+    workbook = openpyxl.Workbook()
+    path = str(tmp_path / "empty.xlsx")
+    workbook.save(path)
+    output_path = str(tmp_path / "output.xlsx")
+
+    assert process_file(path, output_path)
+    assert openpyxl.load_workbook(output_path).active["A1"].value == "Hello World"
+
+def test_csv_is_copied(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("speaker,text\nAlice,Hi\n", encoding="utf-8")
+    output_path = tmp_path / "output.csv"
+
+    assert process_file(str(path), str(output_path))
+    assert output_path.read_text(encoding="utf-8") == "speaker,text\nAlice,Hi\n"
+
+def test_unsupported_or_broken_files_fail(tmp_path):
+    text = tmp_path / "input.txt"
+    text.write_text("hello")
+    assert not process_file(str(text), str(tmp_path / "output.txt"))
+
+    broken = tmp_path / "broken.xlsx"
+    broken.write_bytes(b"not a workbook")
+    assert not process_file(str(broken), str(tmp_path / "output.xlsx"))